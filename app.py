@@ -1,15 +1,45 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Literal, Optional
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import Dict, Literal, Optional, Tuple
+
+from core.session import FIELDS, NAME_MAX, TABLE_PATTERN, SessionFull, make_session_store
+from core.system import AgentSystem
+from core.utils import dumps
 
 # ============================
 #   CONFIG FASTAPI + CORS
 # ============================
 
-app = FastAPI(title="Spectra X - White 5/8 SIMPLES")
+# Estado por mesa (placar + decisão pendente). Em memória por padrão;
+# SPECTRA_SHARED_STATE=1 usa um arquivo mmap compartilhado entre workers
+# (serve.py --workers N) com atualização atômica por registro.
+SESSIONS = make_session_store()
+
+# Sistema multi-agente (bus + state + 10 IAs); threads sobem no startup.
+# Só existe no modo de processo único: com vários workers cada processo veria
+# apenas parte dos giros, então as rotas das IAs respondem 503.
+SYSTEM: Optional[AgentSystem] = None if SESSIONS.shared else AgentSystem()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if SYSTEM is not None:
+        SYSTEM.start()
+    yield
+
+
+app = FastAPI(title="Spectra X - White 5/8 SIMPLES", lifespan=lifespan)
 
 # Libera requisições do navegador (extensão / Blaze)
+@app.exception_handler(SessionFull)
+async def session_full_handler(_request: Request, exc: SessionFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],       # depois você pode restringir para blaze.com se quiser
@@ -23,6 +53,7 @@ app.add_middleware(
 # ============================
 
 SpinColor = Literal["red", "black", "white"]
+DEFAULT_TABLE = "default"
 
 
 class Stats(BaseModel):
@@ -41,11 +72,21 @@ class DecisionResponse(BaseModel):
 
 class PushRoundPayload(BaseModel):
     number: int  # número 0–14 vindo da Blaze
+    # mesa (um placar 5/8 independente por mesa)
+    table: str = Field(DEFAULT_TABLE, max_length=NAME_MAX, pattern=TABLE_PATTERN)
+
+
+class ConfigPatch(BaseModel):
+    entry_mode: Optional[str] = None
+    stake: Optional[float] = None
+    max_gales: Optional[int] = None
+    latency_budget_ms: Optional[float] = None  # orçamento giro -> sinal aprovado
 
 
-# Estado em memória (simples)
-CURRENT_STATS = Stats()
-LAST_DECISION_WAS_ENTRY: bool = False  # se o giro ANTERIOR era sinal de entrada
+# cache do JSON serializado de /stats por mesa: {mesa: (versão, etag, bytes)}
+_STATS_CACHE: Dict[str, Tuple[int, str, bytes]] = {}
+
+TableParam = Query(DEFAULT_TABLE, max_length=NAME_MAX, pattern=TABLE_PATTERN)
 
 
 # ============================
@@ -60,103 +101,236 @@ def number_to_color(num: int) -> SpinColor:
     return "black"
 
 
-# ============================
-#   ROTAS
-# ============================
+def _model_dict(model: BaseModel) -> dict:
+    # pydantic v2 (model_dump) ou v1 (dict)
+    dump = getattr(model, "model_dump", None)
+    return dump() if dump else model.dict()
 
-@app.get("/")
-def root():
-    return {"status": "ok", "service": "Spectra X 5/8", "docs": "/docs"}
 
+def json_response(body: bytes, etag: Optional[str] = None, status_code: int = 200) -> Response:
+    headers = {"ETag": etag} if etag else None
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
 
-@app.post("/api/push_round", response_model=DecisionResponse)
-def push_round(payload: PushRoundPayload):
-    """
-    Recebe um número (0–14) da Blaze a cada novo giro.
 
-    1) Atualiza estatísticas:
-       - resultado da ENTRADA ANTERIOR (se teve)
-       - contador de giros desde o último white
+def require_agents() -> AgentSystem:
+    if SYSTEM is None:
+        raise HTTPException(status_code=503, detail="IAs desativadas no modo multi-worker (SPECTRA_SHARED_STATE)")
+    return SYSTEM
 
-    2) Decide se o PRÓXIMO giro será entrada WHITE
-       pela regra 5/8 (5º e 8º giros após o white).
-    """
-    global CURRENT_STATS, LAST_DECISION_WAS_ENTRY
 
-    stats = CURRENT_STATS
-    stats.total_spins += 1
+def mirror_metrics(rec: dict) -> None:
+    # espelha o placar 5/8 no StateStore para o snapshot de /api/state
+    SYSTEM.state.set("metrics", {
+        "total_signals": rec["attempts_today"],
+        "wins": rec["whites_today"],
+        "losses": rec["losses_today"],
+        "winrate": rec["whites_today"] / rec["attempts_today"] if rec["attempts_today"] else 0.0,
+        "total_spins": rec["total_spins"],
+    })
 
-    num = payload.number
-    color = number_to_color(num)
+
+def stats_payload(table: str, rec: Optional[dict] = None, version: Optional[int] = None):
+    """Retorna (etag, bytes) de /stats, serializando só quando a versão muda."""
+    if version is None:
+        version = SESSIONS.version(table)
+    cached = _STATS_CACHE.get(table)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+    if rec is None:
+        rec, version = SESSIONS.read(table)
+    etag = f'"{SESSIONS.epoch}-{version}"'
+    body = dumps({k: rec[k] for k in FIELDS})
+    if version:  # mesas ainda não criadas não entram no cache
+        _STATS_CACHE[table] = (version, etag, body)
+    return etag, body
+
+
+def apply_5_8(stats: dict, color: SpinColor):
+    """
+    Aplica um giro ao registro da mesa (muta `stats`) e decide o PRÓXIMO giro.
+
+    Retorna (action, reason). `stats["last_entry"]` guarda se ESTE giro
+    gerou entrada, para avaliar o próximo resultado.
+    """
+    stats["total_spins"] += 1
 
     # -------- 1) Resultado da entrada ANTERIOR --------
-    if LAST_DECISION_WAS_ENTRY:
-        stats.attempts_today += 1
+    if stats["last_entry"]:
+        stats["attempts_today"] += 1
         if color == "white":
-            stats.whites_today += 1
+            stats["whites_today"] += 1
         else:
-            stats.losses_today += 1
+            stats["losses_today"] += 1
 
     # -------- 2) Atualiza dist_desde_white --------
     if color == "white":
         # acabou de sair white -> este giro é o próprio white
-        stats.dist_desde_white = 0
+        stats["dist_desde_white"] = 0
     else:
-        if stats.dist_desde_white is not None:
+        if stats["dist_desde_white"] is not None:
             # já vimos um white antes -> soma +1 giro
-            stats.dist_desde_white += 1
+            stats["dist_desde_white"] += 1
         # se nunca viu white (None), continua None
 
     # -------- 3) Decide se o PRÓXIMO giro é entrada 5/8 --------
     action: Literal["aguardar", "entrar_white"] = "aguardar"
     reason = "Ainda não saiu white; aguardando primeiro white."
+    dist = stats["dist_desde_white"]
 
-    if stats.dist_desde_white is not None:
+    if dist is not None:
         # dist_desde_white = quantos giros JÁ passaram desde o white:
         #  0 -> acabou de sair white
         #  1 -> 1º giro após o white
         #  ...
-        proximo_giro = stats.dist_desde_white + 1  # o PRÓXIMO depois deste
+        proximo_giro = dist + 1  # o PRÓXIMO depois deste
 
-        if stats.dist_desde_white == 0:
+        if dist == 0:
             reason = "White acabou de sair; próximo será o 1º giro após o white."
         else:
             reason = (
-                f"{stats.dist_desde_white} giros já passaram desde o white; "
+                f"{dist} giros já passaram desde o white; "
                 f"próximo será o {proximo_giro}º giro."
             )
 
         # 5º giro após o white -> entrada
-        if stats.dist_desde_white == 4:
+        if dist == 4:
             action = "entrar_white"
             reason = "REGRA 5/8: próximo giro é o 5º após o último white (1ª tentativa)."
 
         # 8º giro após o white -> segunda entrada
-        elif stats.dist_desde_white == 7:
+        elif dist == 7:
             action = "entrar_white"
             reason = "REGRA 5/8: próximo giro é o 8º após o último white (2ª tentativa)."
 
-    # guarda se ESTE giro gerou entrada para avaliar o próximo resultado
-    LAST_DECISION_WAS_ENTRY = (action == "entrar_white")
-    CURRENT_STATS = stats
+    stats["last_entry"] = (action == "entrar_white")
+    return action, reason
 
-    return DecisionResponse(
-        action=action,
-        reason=reason,
-        stats=stats,
-    )
+
+def etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    if inm.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in inm.split(","))
+
+
+# ============================
+#   ROTAS
+# ============================
+
+@app.get("/")
+async def root():
+    return {"status": "ok", "service": "Spectra X 5/8", "docs": "/docs"}
+
+
+@app.post("/api/push_round", response_model=DecisionResponse)
+async def push_round(payload: PushRoundPayload):
+    """
+    Recebe um número (0–14) da Blaze a cada novo giro.
+
+    1) Atualiza estatísticas:
+       - resultado da ENTRADA ANTERIOR (se teve)
+       - contador de giros desde o último white
+
+    2) Decide se o PRÓXIMO giro será entrada WHITE
+       pela regra 5/8 (5º e 8º giros após o white).
+    """
+    ingest_ts = time.monotonic()  # início do caminho crítico giro -> sinal (core.latency)
+    num = payload.number
+    color = number_to_color(num)
+    try:
+        (action, reason), rec, version = SESSIONS.transact(payload.table, lambda st: apply_5_8(st, color))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if SYSTEM is not None and payload.table == DEFAULT_TABLE:
+        mirror_metrics(rec)
+        SYSTEM.push_spin(num, ingest_ts)
+
+    etag, stats_body = stats_payload(payload.table, rec, version)
+    # reaproveita o JSON de stats já serializado para a nova versão
+    head = dumps({"action": action, "reason": reason})
+    return json_response(head[:-1] + b',"stats":' + stats_body + b"}", etag)
 
 
 @app.get("/stats", response_model=Stats)
-def get_stats():
-    """Retorna o estado atual do robô (para debug / painel)."""
-    return CURRENT_STATS
+async def get_stats(request: Request, table: str = TableParam):
+    """Retorna o estado atual do robô (para debug / painel).
+
+    Responde 304 quando o cliente já tem a versão atual (If-None-Match).
+    """
+    try:
+        etag, body = stats_payload(table)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return json_response(body, etag)
 
 
 @app.post("/reset", response_model=Stats)
-def reset_stats():
+async def reset_stats(table: str = TableParam):
     """Zera estatísticas e reseta contadores (uso manual)."""
-    global CURRENT_STATS, LAST_DECISION_WAS_ENTRY
-    CURRENT_STATS = Stats()
-    LAST_DECISION_WAS_ENTRY = False
-    return CURRENT_STATS
+    try:
+        rec, version = SESSIONS.reset(table)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if SYSTEM is not None and table == DEFAULT_TABLE:
+        mirror_metrics(rec)
+    etag, body = stats_payload(table, rec, version)
+    return json_response(body, etag)
+
+
+@app.get("/api/health")
+async def health():
+    return {"status": "ok", "mode": "shared" if SESSIONS.shared else "single",
+            "agents": len(SYSTEM.registry.agents) if SYSTEM is not None else 0}
+
+
+@app.get("/api/state")
+async def get_state(request: Request, system: AgentSystem = Depends(require_agents)):
+    """Snapshot atômico do sistema multi-agente (painel).
+
+    Montado uma única vez por versão do StateStore e compartilhado entre
+    todos os clientes; 304 quando If-None-Match bate com a versão atual.
+    """
+    etag, body = system.snapshot()
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return json_response(body, etag)
+
+
+@app.get("/api/history/stats")
+async def history_stats(start: Optional[int] = None, end: Optional[int] = None, last: Optional[int] = None,
+                        system: AgentSystem = Depends(require_agents)):
+    """Contagens/frequências por cor em [start, end) ou nos últimos `last` giros,
+    giros desde o último white e distribuição de gaps entre whites.
+
+    Posições são absolutas (0 = primeiro giro); negativos contam do fim.
+    Tudo sai das somas de prefixo, sem varrer o histórico.
+    """
+    if last is not None and last < 0:
+        raise HTTPException(status_code=422, detail="last deve ser >= 0")
+    return system.spin_index.query(start, end, last)
+
+
+@app.get("/api/latency")
+async def get_latency(system: AgentSystem = Depends(require_agents)):
+    """Histograma da latência giro -> sinal aprovado (por estágio) e estouros do orçamento."""
+    return system.latency.snapshot()
+
+
+@app.get("/api/config")
+async def get_config(system: AgentSystem = Depends(require_agents)):
+    return system.state.get("config", {})
+
+
+@app.post("/api/config")
+async def set_config(patch: ConfigPatch, system: AgentSystem = Depends(require_agents)):
+    """Atualiza parcialmente a configuração (modo de entrada, stake, gales)."""
+    changes = {k: v for k, v in _model_dict(patch).items() if v is not None}
+    system.state.update("config", changes)
+    if "latency_budget_ms" in changes:
+        system.latency.budget_ms = float(changes["latency_budget_ms"])
+    return system.state.get("config", {})
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de alocação (tracemalloc) do caminho spin.new.
+
+Reproduz um fluxo de giros (arquivo com um número 0–14 por linha, ou
+sintético com seed fixa) e compara SÓ o caminho evento/payload:
+  - legacy: Event dataclass + payload dict; assinantes decodificam com color_of
+  - current: Spin pré-decodificado + EventBus.publish (Event do pool)
+
+Os dois lados usam assinantes stub equivalentes (histórico de 5000 e buffer
+de 200 aparados do mesmo jeito, leitura das últimas 3 cores), sem as IAs reais — IAEstatistica e
+IAEstrategica também mantêm SpinIndex e tabelas de Markov, o que mediria
+outra coisa.
+
+Métricas: memória retida pelos históricos, pico transitório durante o
+replay e tempo total.
+
+Uso:  python bench/bench_events.py [--spins 20000] [--replay arquivo.txt]
+Saída: JSON em stdout.
+"""
+import argparse, json, os, random, sys, time, tracemalloc
+from dataclasses import dataclass, field
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bus import Event, EventBus
+from core.spin import Spin, COLORS, code_of_number
+
+# ---------- representação antiga (referência) ----------
+@dataclass
+class LegacyEvent:
+    type: str
+    data: Any
+    ts: float = field(default_factory=lambda: time.time())
+
+def color_of(spin): return "white" if spin.get("white") else spin.get("color")
+
+class LegacySubscriber:
+    def __init__(self, cap, window):
+        self.items, self.cap, self.window = [], cap, window
+    def on_spin(self, evt):
+        self.items.append(evt.data)
+        if len(self.items) > self.cap:
+            del self.items[0]
+        seq = [color_of(x) for x in self.items[-self.window:]]
+        return len(set(seq)) == 1
+
+class CurrentSubscriber:
+    def __init__(self, cap, window):
+        self.items, self.cap, self.window = [], cap, window
+    def on_spin(self, evt):
+        self.items.append(evt.data)
+        if len(self.items) > self.cap:
+            del self.items[0]
+        seq = [x.code for x in self.items[-self.window:]]
+        return len(set(seq)) == 1
+
+def load_numbers(path, n):
+    if path:
+        with open(path) as f:
+            return [int(x) for x in f.read().split()]
+    rnd = random.Random(1234)
+    return [rnd.randint(0, 14) for _ in range(n)]
+
+def run_legacy(numbers):
+    subs = [LegacySubscriber(5000, 3), LegacySubscriber(200, 3)]
+    def emit(evt):
+        for s in subs: s.on_spin(evt)
+    def feed(num):
+        c = code_of_number(num)
+        emit(LegacyEvent("spin.new", {"n": num, "color": COLORS[c], "white": c == 2}))
+    return measure(numbers, feed)
+
+def run_current(numbers):
+    bus = EventBus()
+    for sub in (CurrentSubscriber(5000, 3), CurrentSubscriber(200, 3)):
+        bus.on("spin.new", sub.on_spin)
+    def feed(num):
+        bus.publish("spin.new", Spin.from_number(num))
+    return measure(numbers, feed)
+
+def measure(numbers, feed):
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    warm, stream = numbers[:5000], numbers[5000:]
+    for num in warm:
+        feed(num)
+    filled, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    for num in stream:
+        feed(num)
+    dt = time.perf_counter() - t0
+    cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = max(1, len(stream))
+    return {"events": len(stream), "seconds": round(dt, 4), "us_per_event": round(dt / n * 1e6, 2),
+            "retained_bytes": filled - base, "transient_peak_bytes": peak - cur, "drift_bytes": cur - filled}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--spins", type=int, default=20000)
+    ap.add_argument("--replay", default=None)
+    args = ap.parse_args()
+    numbers = load_numbers(args.replay, args.spins + 5000)
+    out = {"legacy": run_legacy(numbers), "current": run_current(numbers),
+           "sizeof": {"legacy_event": sys.getsizeof(LegacyEvent("spin.new", None)),
+                      "event": sys.getsizeof(Event("spin.new")), "spin": sys.getsizeof(Spin(0, 1)),
+                      "dict_payload": sys.getsizeof({"n": 1, "color": "red", "white": False})}}
+    print(json.dumps(out, indent=2))
+
+if __name__ == "__main__":
+    main()
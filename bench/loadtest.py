@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Load test / benchmark de latência da API (asyncio, sem dependências externas).
+
+Sobe (opcionalmente) um uvicorn local, reproduz uma sequência de giros em
+/api/push_round com taxa e concorrência configuráveis e, em paralelo,
+simula painéis fazendo polling de /stats e /api/state (com If-None-Match).
+
+Uso:
+  python bench/loadtest.py --spawn --rounds 5000 --concurrency 8 --pollers 50
+  python bench/loadtest.py --url http://127.0.0.1:8000 --rate 200 --duration 30
+  python bench/loadtest.py --spawn --workers 4 --replay giros.txt --out result.json
+
+Cada pusher reproduz a sequência inteira, em ordem, na SUA mesa (o
+pusher 0 usa `<table>`, os demais `<table>-<i>`), porque as decisões 5/8
+dependem da ordem dos giros. Logo o total de push_round é
+--rounds x --concurrency, e --rate é a taxa agregada (dividida entre os
+pushers). Só a mesa "default" alimenta as IAs / /api/state, então com o
+--table padrão o pusher 0 exercita o caminho completo (bus, Markov,
+SpinIndex, latência) como em produção.
+
+As mesas usadas são zeradas (/reset) no início: com --url, aponte para um
+servidor de teste. Com --spawn o estado compartilhado vai para um arquivo
+temporário da execução, nunca o /dev/shm de um deploy real.
+
+Com --rate > 0 a latência é medida a partir do instante AGENDADO de cada
+envio (evita coordinated omission); com --rate 0 os pushers enviam o mais
+rápido possível. Saída: JSON (stdout ou --out).
+"""
+import argparse, asyncio, json, os, random, shutil, subprocess, sys, tempfile, time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ============================
+#   CLIENTE HTTP/1.1 MÍNIMO
+# ============================
+
+class Conn:
+    """ Conexão keep-alive; reconecta após erro. """
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for k, v in (headers or {}).items():
+            lines.append(f"{k}: {v}")
+        if body is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        try:
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionError("conexão fechada")
+            status = int(status_line.split()[1])
+            resp_headers = {}
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                resp_headers[k.strip().lower()] = v.strip()
+            n = int(resp_headers.get("content-length", 0))
+            data = await self.reader.readexactly(n) if n else b""
+        except Exception:
+            self.close()
+            raise
+        if resp_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, resp_headers, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+# ============================
+#   MÉTRICAS
+# ============================
+
+class Recorder:
+    def __init__(self):
+        self.lat = {}     # endpoint -> [segundos]
+        self.codes = {}   # endpoint -> {status: n}
+        self.errors = {}  # endpoint -> n (exceções / 5xx)
+        self.fails = {}   # endpoint -> n (exceções, sem latência)
+
+    def add(self, ep, status, seconds):
+        self.lat.setdefault(ep, []).append(seconds)
+        c = self.codes.setdefault(ep, {})
+        c[status] = c.get(status, 0) + 1
+        if status >= 500:
+            self.errors[ep] = self.errors.get(ep, 0) + 1
+
+    def fail(self, ep):
+        self.errors[ep] = self.errors.get(ep, 0) + 1
+        self.fails[ep] = self.fails.get(ep, 0) + 1
+
+    def report(self, elapsed):
+        out = {}
+        for ep in sorted(set(self.lat) | set(self.errors)):
+            lat = sorted(self.lat.get(ep, []))
+            n, err = len(lat), self.errors.get(ep, 0)
+            attempts = n + self.fails.get(ep, 0)
+            out[ep] = {
+                "requests": attempts,
+                "errors": err,
+                "error_rate": round(err / max(1, attempts), 6),
+                "throughput_rps": round(n / elapsed, 2) if elapsed else 0.0,
+                "status": {str(k): v for k, v in sorted(self.codes.get(ep, {}).items())},
+                "latency_ms": {
+                    "p50": pct(lat, 50), "p95": pct(lat, 95), "p99": pct(lat, 99),
+                    "max": round(lat[-1] * 1000, 3) if lat else None,
+                    "mean": round(sum(lat) / n * 1000, 3) if n else None,
+                },
+            }
+        return out
+
+def pct(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return round(sorted_vals[k] * 1000, 3)
+
+# ============================
+#   GERADORES DE CARGA
+# ============================
+
+def load_rounds(path, n, seed):
+    if path:
+        with open(path) as f:
+            nums = [int(x) for x in f.read().split()]
+        return nums[:n] if n else nums
+    rnd = random.Random(seed)
+    return [rnd.randint(0, 14) for _ in range(n or 5000)]
+
+async def pusher(conn, sched, rec, table):
+    for num, at in sched:
+        if at is not None:
+            delay = at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        t0 = at if at is not None else time.perf_counter()
+        body = json.dumps({"number": num, "table": table}).encode()
+        try:
+            status, _, _ = await conn.request("POST", "/api/push_round", body)
+        except Exception:
+            rec.fail("push_round"); continue
+        rec.add("push_round", status, time.perf_counter() - t0)
+
+async def poller(conn, paths, interval, stop, rec, jitter):
+    etags = {}
+    await asyncio.sleep(jitter)
+    i = 0
+    while not stop.is_set():
+        path = paths[i % len(paths)]; i += 1
+        hdrs = {"If-None-Match": etags[path]} if path in etags else None
+        t0 = time.perf_counter()
+        try:
+            status, h, _ = await conn.request("GET", path, headers=hdrs)
+        except Exception:
+            rec.fail(path)
+        else:
+            rec.add(path, status, time.perf_counter() - t0)
+            if "etag" in h:
+                etags[path] = h["etag"]
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+def schedule(rounds, rate, duration, offset=0.0):
+    """ gera (número, instante agendado) — repete a sequência até a duração """
+    start = time.perf_counter() + 0.05 + offset
+    i = 0
+    while True:
+        if duration and (time.perf_counter() - start) >= duration:
+            return
+        if not duration and i >= len(rounds):
+            return
+        at = start + i / rate if rate > 0 else None
+        if at is not None and duration and at - start >= duration:
+            return
+        yield rounds[i % len(rounds)], at
+        i += 1
+
+async def run(args, host, port):
+    rounds = load_rounds(args.replay, args.rounds, args.seed)
+    rec = Recorder()
+    stop = asyncio.Event()
+    n = max(1, args.concurrency)
+    tables = [args.table] + [f"{args.table}-{i}" for i in range(1, n)]
+    rate = args.rate / n  # taxa por pusher; defasados para espalhar os envios
+    conns = []
+    # reset para partir de estado conhecido
+    c0 = Conn(host, port); conns.append(c0)
+    for table in tables:
+        await c0.request("POST", f"/reset?table={table}")
+    pushers = []
+    for i, table in enumerate(tables):
+        sched = schedule(rounds, rate, args.duration, offset=(i / args.rate) if args.rate > 0 else 0.0)
+        c = Conn(host, port); conns.append(c)
+        pushers.append(asyncio.create_task(pusher(c, sched, rec, table)))
+    # /stats sem mesa explícita acompanha a mesa do primeiro pusher
+    paths = [f"/stats?table={tables[0]}" if p == "/stats" else p for p in args.poll_paths.split(",") if p]
+    pollers = []
+    for k in range(args.pollers):
+        c = Conn(host, port); conns.append(c)
+        jitter = args.poll_interval * k / max(1, args.pollers)
+        pollers.append(asyncio.create_task(poller(c, paths, args.poll_interval, stop, rec, jitter)))
+    t0 = time.perf_counter()
+    await asyncio.gather(*pushers)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await asyncio.gather(*pollers)
+    for c in conns:
+        c.close()
+    return {
+        "config": {"target": f"http://{host}:{port}", "rounds": len(rounds), "tables": tables, "rate": args.rate,
+                   "duration": args.duration, "concurrency": args.concurrency, "pollers": args.pollers,
+                   "poll_interval": args.poll_interval, "poll_paths": paths, "workers": args.workers,
+                   "replay": args.replay, "seed": args.seed},
+        "elapsed_s": round(elapsed, 3),
+        "endpoints": rec.report(elapsed),
+    }
+
+# ============================
+#   SERVIDOR LOCAL
+# ============================
+
+def spawn_server(port, workers, env_extra):
+    # serve.py: socket com IPPROTO_TCP/TCP_NODELAY também com vários workers
+    env = dict(os.environ, **env_extra)
+    cmd = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+async def wait_ready(host, port, timeout=20.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        c = Conn(host, port)
+        try:
+            status, _, _ = await c.request("GET", "/api/health")
+            if status == 200:
+                return
+        except Exception:
+            pass
+        finally:
+            c.close()
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"servidor não respondeu em {host}:{port}")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--url", default="http://127.0.0.1:8765", help="API alvo")
+    ap.add_argument("--spawn", action="store_true", help="sobe um uvicorn local na porta de --url")
+    ap.add_argument("--workers", type=int, default=1, help="workers do uvicorn (--spawn)")
+    ap.add_argument("--shared-state", action="store_true", help="SPECTRA_SHARED_STATE=1 no servidor (--spawn)")
+    ap.add_argument("--replay", default=None, help="arquivo com números 0–14 (um por linha)")
+    ap.add_argument("--rounds", type=int, default=5000, help="giros sintéticos (ou corte do replay), por pusher")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--rate", type=float, default=0.0, help="push_round/s (0 = máximo)")
+    ap.add_argument("--duration", type=float, default=0.0, help="segundos (0 = até acabar os giros)")
+    ap.add_argument("--concurrency", type=int, default=4, help="pushers (uma conexão e uma mesa cada; o 0 usa --table)")
+    ap.add_argument("--pollers", type=int, default=20, help="painéis simultâneos")
+    ap.add_argument("--poll-interval", type=float, default=1.2, help="segundos entre polls por painel")
+    ap.add_argument("--poll-paths", default="/stats,/api/state")
+    ap.add_argument("--table", default="default")
+    ap.add_argument("--out", default=None, help="grava o JSON neste arquivo")
+    args = ap.parse_args()
+
+    u = urlsplit(args.url)
+    host, port = u.hostname or "127.0.0.1", u.port or 80
+    proc = tmpdir = None
+    if args.spawn:
+        env_extra = {}
+        if args.shared_state or args.workers > 1:
+            # arquivo próprio da execução: não toca o placar de um deploy real
+            tmpdir = tempfile.mkdtemp(prefix="spectra-loadtest-")
+            env_extra["SPECTRA_SHARED_STATE"] = os.path.join(tmpdir, "loadtest.bin")
+        proc = spawn_server(port, args.workers, env_extra)
+    try:
+        if proc is not None:
+            asyncio.run(wait_ready(host, port))
+        result = asyncio.run(run(args, host, port))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,63 @@
 # -*- coding: utf-8 -*-
-import threading, time
-from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List
+import sys, threading, time
+from typing import Any, Callable, Dict, List, Tuple
 
-@dataclass
 class Event:
-    type: str
-    data: Any
-    ts: float = field(default_factory=lambda: time.time())
+    """ Evento leve (__slots__, sem __dict__); ts é time.monotonic().
+    type é internado: o lookup em EventBus.subscribers compara por identidade. """
+    __slots__ = ("type", "data", "ts")
+
+    def __init__(self, type: str, data: Any = None, ts: float = None):
+        self.type = sys.intern(type)
+        self.data = data
+        self.ts = time.monotonic() if ts is None else ts
+
+    def __repr__(self):
+        return f"Event(type={self.type!r}, data={self.data!r}, ts={self.ts!r})"
+
+# pool de eventos reutilizáveis (usado por EventBus.publish)
+_POOL: List[Event] = []
+POOL_MAX = 256
+
+def acquire(type: str, data: Any, ts: float = None) -> Event:
+    try:
+        evt = _POOL.pop()
+    except IndexError:
+        return Event(type, data, ts)
+    evt.type = sys.intern(type)
+    evt.data = data
+    evt.ts = time.monotonic() if ts is None else ts
+    return evt
+
+def release(evt: Event) -> None:
+    evt.data = None
+    if len(_POOL) < POOL_MAX:
+        _POOL.append(evt)
 
 class EventBus:
     """ Barramento simples pub/sub thread-safe. """
     def __init__(self):
-        self.subscribers: Dict[str, List[Callable[[Event], None]]] = {}
+        # copy-on-write: emit lê a tupla sem lock e sem copiar
+        self.subscribers: Dict[str, Tuple[Callable[[Event], None], ...]] = {}
         self.lock = threading.Lock()
 
     def on(self, event_type: str, callback: Callable[[Event], None]):
+        event_type = sys.intern(event_type)
         with self.lock:
-            self.subscribers.setdefault(event_type, []).append(callback)
+            self.subscribers[event_type] = self.subscribers.get(event_type, ()) + (callback,)
 
     def emit(self, event: Event):
-        with self.lock:
-            callbacks = list(self.subscribers.get(event.type, []))
-        for cb in callbacks:
+        for cb in self.subscribers.get(event.type, ()):
             try:
                 cb(event)
             except Exception as e:
                 print(f"[BUS] erro em callback {cb}: {e}")
+
+    def publish(self, event_type: str, data: Any = None, ts: float = None):
+        """ emit com Event do pool; callbacks NÃO podem guardar o evento (só evt.data).
+        ts (monotonic) permite datar o evento na origem, antes do publish. """
+        evt = acquire(event_type, data, ts)
+        try:
+            self.emit(evt)
+        finally:
+            release(evt)
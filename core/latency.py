@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Histograma de latência do caminho crítico giro -> sinal aprovado.
+
+Os timestamps de cada estágio vêm de time.monotonic() (mesmo relógio de
+core.bus.Event.ts) dentro de proposal["trace"]. "ingest" é tomado na
+entrada de /api/push_round, então "predict" inclui a atualização do
+placar (SESSIONS.transact) e a publicação do giro.
+"""
+import bisect, threading
+
+# limites superiores dos buckets, em ms (último = +inf)
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+STAGES = ("predict", "validate", "e2e")
+
+class LatencyTracker:
+    """ Histogramas por estágio + contagem de estouros do orçamento. """
+    def __init__(self, budget_ms: float = 50.0):
+        self.budget_ms = float(budget_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._hist = {s: [0] * len(BUCKETS_MS) for s in STAGES}
+            self._sum = dict.fromkeys(STAGES, 0.0)
+            self._max = dict.fromkeys(STAGES, 0.0)
+            self.count = 0
+            self.over_budget = 0
+            self.last = None
+
+    def record(self, trace: dict) -> float:
+        """ Registra um trace completo; retorna a latência e2e em ms. """
+        t0 = trace["ingest"]
+        ms = {
+            "predict": (trace["predicted"] - t0) * 1000.0,
+            "validate": (trace["approved"] - trace["predicted"]) * 1000.0,
+            "e2e": (trace["approved"] - t0) * 1000.0,
+        }
+        with self._lock:
+            for s, v in ms.items():
+                self._hist[s][bisect.bisect_left(BUCKETS_MS, v)] += 1
+                self._sum[s] += v
+                if v > self._max[s]: self._max[s] = v
+            self.count += 1
+            if ms["e2e"] > self.budget_ms:
+                self.over_budget += 1
+            self.last = {s: round(v, 4) for s, v in ms.items()}
+        return ms["e2e"]
+
+    def _quantile(self, hist, q):
+        # limite superior do bucket que contém o quantil
+        target = q * self.count
+        acc = 0
+        for ub, n in zip(BUCKETS_MS, hist):
+            acc += n
+            if acc >= target and n:
+                return ub if ub != float("inf") else None
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            n = self.count
+            stages = {}
+            for s in STAGES:
+                h = self._hist[s]
+                stages[s] = {
+                    "mean_ms": round(self._sum[s] / n, 4) if n else None,
+                    "max_ms": round(self._max[s], 4) if n else None,
+                    "p50_ms": self._quantile(h, 0.50) if n else None,
+                    "p95_ms": self._quantile(h, 0.95) if n else None,
+                    "p99_ms": self._quantile(h, 0.99) if n else None,
+                    "buckets": {("+inf" if ub == float("inf") else str(ub)): c for ub, c in zip(BUCKETS_MS, h) if c},
+                }
+            return {"count": n, "budget_ms": self.budget_ms, "over_budget": self.over_budget,
+                    "last": self.last, "stages": stages}
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Estado de sessão por mesa (placar 5/8 + decisão pendente).
+
+- MemorySessionStore: dict em memória (um único processo).
+- SharedSessionStore: arquivo mmap com registros de layout fixo, para
+  rodar `python serve.py --workers N`; cada atualização trava só o
+  registro da mesa (fcntl.lockf) e é atômica entre processos.
+
+Ambos expõem a mesma API: transact / read / version / reset.
+Um registro é um dict com FIELDS + "last_entry".
+"""
+import fcntl, mmap, os, re, struct, tempfile, threading, uuid, zlib
+
+FIELDS = ("whites_today", "losses_today", "attempts_today", "dist_desde_white", "total_spins")
+NAME_MAX = 32
+MAX_TABLES = 256
+TABLE_PATTERN = r"^[A-Za-z0-9_.-]{1,32}$"  # ASCII: 1 caractere = 1 byte do registro
+_TABLE_RE = re.compile(TABLE_PATTERN)
+
+class SessionFull(RuntimeError):
+    """ Não há registro livre para uma nova mesa. """
+
+def check_table(table):
+    if not isinstance(table, str) or not _TABLE_RE.match(table):
+        raise ValueError(f"nome de mesa inválido: {table!r}")
+    return table
+
+def blank_record():
+    rec = dict.fromkeys(FIELDS, 0)
+    rec["dist_desde_white"] = None
+    rec["last_entry"] = False
+    return rec
+
+class MemorySessionStore:
+    """ Estado em memória (modo single-process). """
+    shared = False
+
+    def __init__(self, nslots=MAX_TABLES):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.nslots = nslots
+        self._tables = {}  # nome -> [rec, versão]
+        self._lock = threading.Lock()
+
+    def _slot(self, table):
+        slot = self._tables.get(table)
+        if slot is None:
+            check_table(table)
+            if len(self._tables) >= self.nslots:
+                raise SessionFull("sem espaço para novas mesas")
+            slot = self._tables[table] = [blank_record(), 0]
+        return slot
+
+    def transact(self, table, fn):
+        """ Aplica fn(rec) atomicamente; retorna (resultado, cópia do rec, versão). """
+        with self._lock:
+            slot = self._slot(table)
+            result = fn(slot[0])
+            slot[1] += 1
+            return result, dict(slot[0]), slot[1]
+
+    def read(self, table):
+        """ Mesa inexistente -> registro zerado, versão 0 (sem ocupar slot). """
+        check_table(table)
+        with self._lock:
+            slot = self._tables.get(table)
+            return (dict(slot[0]), slot[1]) if slot else (blank_record(), 0)
+
+    def version(self, table):
+        slot = self._tables.get(table)
+        return slot[1] if slot else 0
+
+    def reset(self, table):
+        if table not in self._tables:
+            return self.read(table)
+        return self.transact(table, lambda rec: rec.update(blank_record()))[1:]
+
+# ---------- layout do arquivo compartilhado ----------
+# header: magic, epoch, nslots  (64 bytes)
+# registro: nome, versão, 5 contadores (dist=-1 -> None), last_entry
+HEADER = struct.Struct("<8s8sQ")
+HEADER_SIZE = 64
+MAGIC = b"SPX58v1\x00"
+RECORD = struct.Struct(f"<{NAME_MAX}sQqqqqqB7x")
+VERSION_AT = NAME_MAX  # offset da versão dentro do registro
+
+def default_shared_path():
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "spectra-sessions.bin")
+
+class SharedSessionStore:
+    """ Registros de layout fixo num arquivo mmap, compartilhados entre workers. """
+    shared = True
+
+    def __init__(self, path=None, nslots=MAX_TABLES):
+        self.path = path or default_shared_path()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = HEADER_SIZE + nslots * RECORD.size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            if os.fstat(self._fd).st_size < HEADER_SIZE:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, uuid.uuid4().hex[:8].encode(), nslots), 0)
+            magic, epoch, n = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+            if magic != MAGIC:
+                raise ValueError(f"arquivo de sessão inválido: {self.path}")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+        self.nslots = n
+        self.epoch = epoch.decode()
+        self._mm = mmap.mmap(self._fd, HEADER_SIZE + n * RECORD.size)
+        self._offsets = {}  # cache local nome -> offset
+        self._tlock = threading.Lock()  # lockf não exclui threads do mesmo processo
+
+    # ---------- travas por registro ----------
+    def _lock(self, off, kind=fcntl.LOCK_EX):
+        fcntl.lockf(self._fd, kind, RECORD.size, off)
+
+    def _unlock(self, off):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, RECORD.size, off)
+
+    def _offset(self, table, create=True):
+        off = self._offsets.get(table)
+        if off is not None:
+            return off
+        name = check_table(table).encode("ascii")
+        key = name.ljust(NAME_MAX, b"\x00")
+        start = zlib.crc32(name) % self.nslots
+        for i in range(self.nslots):
+            off = HEADER_SIZE + ((start + i) % self.nslots) * RECORD.size
+            cur = self._mm[off:off+NAME_MAX]
+            if cur == key:
+                self._offsets[table] = off
+                return off
+            if cur.strip(b"\x00"):
+                # nome pode estar no meio da escrita por outro worker: relê sob trava
+                with self._tlock:
+                    self._lock(off, fcntl.LOCK_SH)
+                    try:
+                        cur = self._mm[off:off+NAME_MAX]
+                    finally:
+                        self._unlock(off)
+                if cur == key:
+                    self._offsets[table] = off
+                    return off
+                continue
+            if not create:
+                return None
+            # slot livre: reivindica sob trava e confere de novo
+            with self._tlock:
+                self._lock(off)
+                try:
+                    cur = self._mm[off:off+NAME_MAX]
+                    if not cur.strip(b"\x00"):
+                        self._pack(off, blank_record(), 0, key)
+                        cur = key
+                finally:
+                    self._unlock(off)
+            if cur == key:
+                self._offsets[table] = off
+                return off
+        if not create:
+            return None
+        raise SessionFull("sem espaço para novas mesas no arquivo de sessão")
+
+    def _unpack(self, off):
+        name, version, w, l, a, d, t, last = RECORD.unpack_from(self._mm, off)
+        rec = {"whites_today": w, "losses_today": l, "attempts_today": a,
+               "dist_desde_white": None if d < 0 else d, "total_spins": t, "last_entry": bool(last)}
+        return rec, version, name
+
+    def _pack(self, off, rec, version, name):
+        d = rec["dist_desde_white"]
+        RECORD.pack_into(self._mm, off, name, version, rec["whites_today"], rec["losses_today"],
+                         rec["attempts_today"], -1 if d is None else d, rec["total_spins"],
+                         1 if rec["last_entry"] else 0)
+
+    # ---------- API ----------
+    def transact(self, table, fn):
+        off = self._offset(table)
+        with self._tlock:
+            self._lock(off)
+            try:
+                rec, version, name = self._unpack(off)
+                result = fn(rec)
+                version += 1
+                self._pack(off, rec, version, name)
+            finally:
+                self._unlock(off)
+        return result, rec, version
+
+    def read(self, table):
+        """ Mesa inexistente -> registro zerado, versão 0 (sem ocupar slot). """
+        off = self._offset(table, create=False)
+        if off is None:
+            return blank_record(), 0
+        with self._tlock:
+            self._lock(off, fcntl.LOCK_SH)
+            try:
+                rec, version, _ = self._unpack(off)
+            finally:
+                self._unlock(off)
+        return rec, version
+
+    def version(self, table):
+        """ leitura sem trava (8 bytes alinhados) — só para validar cache """
+        off = self._offset(table, create=False)
+        if off is None:
+            return 0
+        return struct.unpack_from("<Q", self._mm, off + VERSION_AT)[0]
+
+    def reset(self, table):
+        if self._offset(table, create=False) is None:
+            return blank_record(), 0
+        return self.transact(table, lambda rec: rec.update(blank_record()))[1:]
+
+def make_session_store():
+    """ SPECTRA_SHARED_STATE=1 (ou um caminho) ativa o modo multi-worker. """
+    opt = os.environ.get("SPECTRA_SHARED_STATE", "").strip()
+    if not opt or opt == "0":
+        return MemorySessionStore()
+    return SharedSessionStore(None if opt == "1" else opt)
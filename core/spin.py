@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+""" Giro pré-decodificado: cor como código inteiro, número e sequência. """
+import itertools
+
+RED, BLACK, WHITE = 0, 1, 2
+COLORS = ("red", "black", "white")
+CODES = {c: i for i, c in enumerate(COLORS)}
+
+def code_of_number(num: int) -> int:
+    if num == 0: return WHITE
+    return RED if num <= 7 else BLACK
+
+class Spin:
+    """ Registro compacto de um giro, decodificado uma vez na ingestão. """
+    __slots__ = ("code", "n", "seq")
+    _seq = itertools.count(1)
+
+    def __init__(self, code: int, n: int = None, seq: int = None):
+        self.code = code
+        self.n = n
+        self.seq = next(Spin._seq) if seq is None else seq
+
+    @classmethod
+    def from_number(cls, num: int) -> "Spin":
+        return cls(code_of_number(num), num)
+
+    @property
+    def color(self) -> str:
+        return COLORS[self.code]
+
+    @property
+    def white(self) -> bool:
+        return self.code == WHITE
+
+    def to_dict(self):
+        return {"n": self.n, "color": COLORS[self.code], "white": self.code == WHITE, "seq": self.seq}
+
+    def __repr__(self):
+        return f"Spin({COLORS[self.code]}, n={self.n}, seq={self.seq})"
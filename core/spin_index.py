@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de somas de prefixo sobre o histórico de giros.
+
+Posições são absolutas (0 = primeiro giro ingerido). Mantém contagens
+acumuladas por cor e o histograma de distâncias entre whites, então
+contagens/frequências de qualquer intervalo retido e a distribuição de
+gaps saem em O(1), sem varrer o histórico.
+"""
+import threading
+from array import array
+from collections import deque
+
+from core.spin import COLORS, RED, WHITE
+
+class SpinIndex:
+    """ Contagens acumuladas (red/white; black = total - red - white) + gaps entre whites. """
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self._base = 0                  # posição absoluta de _red[0]/_white[0]
+        self._red = array("l", [0])     # _red[t] = reds em [base, base+t)
+        self._white = array("l", [0])
+        self._whites = deque()          # posições dos whites retidos
+        self._gaps = {}                 # distância entre whites consecutivos -> ocorrências
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._base + len(self._red) - 1
+
+    def append(self, code: int) -> None:
+        with self._lock:
+            pos = self._base + len(self._red) - 1
+            self._red.append(self._red[-1] + (code == RED))
+            self._white.append(self._white[-1] + (code == WHITE))
+            if code == WHITE:
+                if self._whites:
+                    gap = pos - self._whites[-1]
+                    self._gaps[gap] = self._gaps.get(gap, 0) + 1
+                self._whites.append(pos)
+            if len(self._red) > 2 * self.capacity:
+                self._compact()
+
+    def _compact(self) -> None:
+        # descarta a metade antiga; diferenças entre prefixos continuam válidas
+        d = len(self._red) - 1 - self.capacity
+        del self._red[:d]
+        del self._white[:d]
+        self._base += d
+        while self._whites and self._whites[0] < self._base:
+            old = self._whites.popleft()
+            if self._whites:
+                gap = self._whites[0] - old
+                n = self._gaps[gap] - 1
+                if n: self._gaps[gap] = n
+                else: del self._gaps[gap]
+
+    # ---------- consultas O(1) ----------
+    def bounds(self):
+        """ (primeira posição retida, fim exclusivo) """
+        with self._lock:
+            return self._base, self._base + len(self._red) - 1
+
+    def _clamp(self, start, end):
+        lo, hi = self._base, self._base + len(self._red) - 1
+        if start is None: start = lo
+        if end is None: end = hi
+        if start < 0: start += hi
+        if end < 0: end += hi
+        start, end = max(lo, min(start, hi)), max(lo, min(end, hi))
+        return start, max(start, end)
+
+    def counts(self, start=None, end=None):
+        """ Contagens por cor em [start, end); índices negativos contam a partir do fim. """
+        with self._lock:
+            start, end = self._clamp(start, end)
+            i, j = start - self._base, end - self._base
+            red = self._red[j] - self._red[i]
+            white = self._white[j] - self._white[i]
+        n = end - start
+        return start, end, {"red": red, "black": n - red - white, "white": white}
+
+    def last(self, n: int):
+        """ Contagens dos últimos n giros (limitado ao histórico retido). """
+        with self._lock:
+            end = self._base + len(self._red) - 1
+            start = max(self._base, end - n)
+            i, j = start - self._base, end - self._base
+            red = self._red[j] - self._red[i]
+            white = self._white[j] - self._white[i]
+        n = end - start
+        return start, end, {"red": red, "black": n - red - white, "white": white}
+
+    def frequencies(self, start=None, end=None):
+        start, end, c = self.counts(start, end)
+        n = end - start
+        return start, end, {k: (v / n if n else 0.0) for k, v in c.items()}
+
+    def since_white(self):
+        """ Giros desde o último white retido (None se não houver). """
+        with self._lock:
+            if not self._whites: return None
+            return self._base + len(self._red) - 2 - self._whites[-1]
+
+    def gap_histogram(self):
+        """ Distribuição das distâncias entre whites consecutivos retidos. """
+        with self._lock:
+            return dict(self._gaps)
+
+    def query(self, start=None, end=None, last=None):
+        """ Resposta completa para o painel (/api/history/stats). """
+        if last is not None:
+            start, end, c = self.last(last)
+        else:
+            start, end, c = self.counts(start, end)
+        n = end - start
+        lo, hi = self.bounds()
+        gaps = self.gap_histogram()
+        return {
+            "start": start, "end": end, "n": n,
+            "counts": c,
+            "freq": {k: (c[k] / n if n else 0.0) for k in COLORS},
+            "retained": {"start": lo, "end": hi},
+            "since_white": self.since_white(),
+            "gaps": {str(g): gaps[g] for g in sorted(gaps)},
+        }
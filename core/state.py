@@ -7,10 +7,12 @@ class StateStore:
         self._data = {}
         self._lock = threading.Lock()
         self._events = collections.deque(maxlen=2000)
+        self._version = 0  # incrementa a cada escrita (cache de snapshots)
 
     def set(self, key, value):
         with self._lock:
             self._data[key] = value
+            self._version += 1
 
     def get(self, key, default=None):
         with self._lock:
@@ -19,21 +21,34 @@ class StateStore:
     def update(self, key, patch: dict):
         with self._lock:
             base = self._data.get(key, {})
-            if not isinstance(base, dict):
-                base = {}
+            # copy-on-write: snapshots antigos continuam imutáveis
+            base = dict(base) if isinstance(base, dict) else {}
             if isinstance(patch, dict):
                 base.update(patch)
             self._data[key] = base
+            self._version += 1
 
     def reset(self):
         with self._lock:
             self._data.clear()
             self._events.clear()
+            self._version += 1
 
     def push_event(self, evt: dict):
         with self._lock:
             self._events.append(evt)
+            self._version += 1
 
     def tail_events(self, n: int):
         with self._lock:
             return list(self._events)[-n:]
+
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def snapshot(self, n_events: int):
+        """ (versão, cópia rasa dos dados, últimos n eventos) de forma atômica """
+        with self._lock:
+            events = list(self._events)[-n_events:] if n_events > 0 else []
+            return self._version, dict(self._data), events
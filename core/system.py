@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import threading, uuid
+from core.bus import EventBus
+from core.spin import Spin
+from core.state import StateStore
+from core.registry import AgentRegistry
+from core.utils import dumps
+from ias.ia_aprendizado import IAAprendizado
+from ias.ia_auxiliar import IAAuxiliar
+from ias.ia_contexto import IAContexto
+from ias.ia_desempenho import IADesempenho
+from ias.ia_emocional import IAEmocional
+from ias.ia_estatistica import IAEstatistica
+from ias.ia_estrategias import IAEstrategias
+from ias.ia_estrategica import IAEstrategica
+from ias.ia_seguranca import IASeguranca
+from ias.ia_social import IASocial
+
+AGENTS = [
+    ("estatistica", IAEstatistica),
+    ("estrategias", IAEstrategias),
+    ("aprendizado", IAAprendizado),
+    ("estrategica", IAEstrategica),
+    ("auxiliar", IAAuxiliar),
+    ("seguranca", IASeguranca),
+    ("social", IASocial),
+    ("emocional", IAEmocional),
+    ("contexto", IAContexto),
+    ("desempenho", IADesempenho),
+]
+
+DEFAULT_CONFIG = {"entry_mode": "colors", "stake": 2.0, "max_gales": 2, "latency_budget_ms": 50.0}
+
+class AgentSystem:
+    """ Monta bus + state + registry, sobe as IAs e serve snapshots para a API. """
+    HISTORY_TAIL = 20
+    EVENT_TAIL = 30
+    POOL_TOP_K = 10
+
+    def __init__(self):
+        self.bus = EventBus()
+        self.state = StateStore()
+        self.registry = AgentRegistry(self.bus, self.state)
+        self.state.set("config", dict(DEFAULT_CONFIG))
+        for name, cls in AGENTS:
+            self.registry.register(cls(name, self.bus, self.state))
+        self._threads = []
+        self._snap_lock = threading.Lock()
+        self._snap = (-1, "", b"")  # (versão, etag, bytes)
+        self._boot = uuid.uuid4().hex[:8]
+
+    @property
+    def spin_index(self):
+        return self.registry.agents["estatistica"].index
+
+    @property
+    def latency(self):
+        return self.registry.agents["desempenho"].latency
+
+    def start(self):
+        if self._threads: return
+        for name, agent in self.registry.agents.items():
+            t = threading.Thread(target=agent.run, name=f"ia-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def push_spin(self, number: int, ts: float = None) -> Spin:
+        """ ts: time.monotonic() da chegada do giro (vira Event.ts / trace["ingest"]) """
+        spin = Spin.from_number(number)
+        tail = (self.state.get("history.tail") or ())[-(self.HISTORY_TAIL-1):] + (spin,)
+        self.state.set("history.tail", tail)
+        self.bus.publish("spin.new", spin, ts)
+        return spin
+
+    # ---------- snapshot ----------
+    def _build(self, data, events):
+        paused = bool(data.get("system.paused", False))
+        agents = {}
+        for name in self.registry.agents:
+            # sem last_tick: muda a cada tick sem subir a versão, ficaria velho no cache
+            agents[name] = {"paused": paused or bool(data.get(f"{name}.paused", False))}
+        pool = data.get("learning.pool") or {}
+        top = sorted(pool.items(), key=lambda kv: kv[1].get("score", 0), reverse=True)[:self.POOL_TOP_K]
+        active = data.get("active.strategy")
+        ga = data.get("ga") or {}
+        last = data.get("signal.last")
+        vol = data.get("context.volatility")
+        market = None
+        if vol is not None:
+            unstable = vol > 0.85 or paused
+            market = {"status": "unstable" if unstable else "stable", "score": vol,
+                      "reason": "sistema pausado" if paused else "volatilidade alta"}
+        return {
+            "agents": agents,
+            "paused": paused,
+            "config": data.get("config") or {},
+            "metrics": data.get("metrics") or {},
+            "history_tail": [s.to_dict() for s in data.get("history.tail") or ()],
+            "market": market,
+            "auto_strategy": {
+                "active": active,
+                "active_score": pool.get(active.get("id"), {}).get("score") if active else None,
+                "generation": ga.get("generation"),
+                "pool_size": ga.get("pool_size"),
+            },
+            "active_signal": {"color": last.get("suggest"), "confidence": last.get("confidence", 0),
+                              "source": last.get("source"), "strategy_id": last.get("strategy_id"),
+                              "status": "approved"} if last else None,
+            "last_signal": last,
+            "learning_top": [{"id": k, "score": v.get("score", 0)} for k, v in top],
+            "latency": data.get("perf.latency"),
+            "events": events,
+        }
+
+    def snapshot(self):
+        """ (etag, bytes) do estado; montado uma vez por versão e compartilhado. """
+        snap = self._snap
+        if snap[0] == self.state.version():
+            return snap[1], snap[2]
+        with self._snap_lock:
+            version, data, events = self.state.snapshot(self.EVENT_TAIL)
+            if self._snap[0] != version:
+                body = dumps(self._build(data, events))
+                self._snap = (version, f'"s{self._boot}-{version}"', body)
+            return self._snap[1], self._snap[2]
@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 import time, json
 
+try:  # encoder rápido opcional
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 def ts():
     return int(time.time())
 
@@ -10,3 +15,9 @@ def safe_dict(obj):
         return obj
     except Exception:
         return {"repr": repr(obj)}
+
+def dumps(obj) -> bytes:
+    """ JSON compacto em bytes (orjson quando disponível) """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
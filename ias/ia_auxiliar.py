@@ -13,6 +13,8 @@ class IAAuxiliar(BaseAgent):
         prop = dict(evt.data)
         # regra inicial: aprova se sistema não está pausado e existe strategy_id
         if not self.state.get("system.paused", False) and prop.get("strategy_id"):
+            if "trace" in prop:
+                prop["trace"] = dict(prop["trace"], approved=time.monotonic())
             self.bus.emit(Event("signal.approved", {"proposal": prop, "by": self.name}))
             # espelha para /signal
             self.state.set("signal.last", prop)
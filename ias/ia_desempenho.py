@@ -1,9 +1,35 @@
 # -*- coding: utf-8 -*-
-"""IA de Desempenho — telemetria simples."""
+"""IA de Desempenho — telemetria simples + latência giro -> sinal aprovado."""
 import time
 from core.base_agent import BaseAgent
+from core.bus import Event
+from core.latency import LatencyTracker
+
 class IADesempenho(BaseAgent):
     TICK_MS = 1800
-    def _bind(self): pass
+    ALERT_EVERY_S = 1.0  # no máximo um alerta por segundo (estouros seguem contados)
+
+    def _bind(self):
+        cfg = self.state.get("config") or {}
+        self.latency = LatencyTracker(cfg.get("latency_budget_ms", 50.0))
+        self._last_alert = 0.0
+        self.bus.on("signal.approved", self.on_approved)
+
+    def on_approved(self, evt):
+        trace = evt.data.get("proposal", {}).get("trace")
+        if not trace or "approved" not in trace: return
+        e2e = self.latency.record(trace)
+        if e2e > self.latency.budget_ms:
+            now = time.monotonic()
+            if now - self._last_alert >= self.ALERT_EVERY_S:
+                self._last_alert = now
+                msg = f"Latência giro->sinal {e2e:.2f} ms acima do orçamento ({self.latency.budget_ms:g} ms)"
+                self.state.push_event({"agent": self.name, "msg": msg, "ts": time.time()})
+                self.bus.emit(Event("latency.alert", {"e2e_ms": e2e, "budget_ms": self.latency.budget_ms,
+                                                      "spin_seq": evt.data["proposal"].get("spin_seq")}))
+
     def tick(self):
+        cfg = self.state.get("config") or {}
+        self.latency.budget_ms = float(cfg.get("latency_budget_ms", self.latency.budget_ms))
         self.state.update("perf", {"ok": True, "ts": int(time.time())})
+        self.state.set("perf.latency", self.latency.snapshot())
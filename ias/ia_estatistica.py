@@ -3,19 +3,25 @@
 import time
 from core.base_agent import BaseAgent
 from core.bus import Event
+from core.spin import RED, BLACK
+from core.spin_index import SpinIndex
+from markov import backtest_markov, strategy_args
 
-def color_of(spin): return "white" if spin.get("white") else spin.get("color")
+HISTORY_MAX = 5000
 
 class IAEstatistica(BaseAgent):
     TICK_MS = 800
     def _bind(self):
         self.history = []
+        self.index = SpinIndex()  # contagens por intervalo em O(1) (painel / análises)
         self.bus.on("spin.new", self.on_spin)
         self.bus.on("strategy.candidate", self.on_candidate)
 
     def on_spin(self, evt):
-        self.history.append(evt.data)
-        self.history = self.history[-5000:]
+        self.history.append(evt.data)  # core.spin.Spin
+        self.index.append(evt.data.code)
+        if len(self.history) > HISTORY_MAX:
+            del self.history[0]
 
     def on_candidate(self, evt):
         s = evt.data
@@ -27,10 +33,10 @@ class IAEstatistica(BaseAgent):
     def _bt_repeat(self, data, n, window):
         wins=loss=0
         for i in range(n, len(data)):
-            seq = [color_of(x) for x in data[i-n:i]]
+            seq = [x.code for x in data[i-n:i]]
             if len(set(seq))==1:
                 pred = seq[-1]
-                actual = color_of(data[i])
+                actual = data[i].code
                 wins += (pred==actual)
                 loss += (pred!=actual)
         return wins, loss
@@ -38,15 +44,15 @@ class IAEstatistica(BaseAgent):
     def _bt_alternation(self, data, alt_len, window):
         wins=loss=0
         for i in range(alt_len, len(data)):
-            seq = [color_of(x) for x in data[i-alt_len:i+1]]
+            seq = [x.code for x in data[i-alt_len:i+1]]
             alt = True
             for k in range(1,len(seq)):
                 if seq[k]==seq[k-1]: alt=False; break
             if alt:
                 last = seq[-1]
-                pred = "red" if last=="black" else ("black" if last=="red" else None)
-                if pred:
-                    actual = color_of(data[i])
+                pred = RED if last==BLACK else (BLACK if last==RED else None)
+                if pred is not None:
+                    actual = data[i].code
                     wins += (pred==actual)
                     loss += (pred!=actual)
         return wins, loss
@@ -54,22 +60,29 @@ class IAEstatistica(BaseAgent):
     def _bt_cluster(self, data, cluster_th, window):
         wins=loss=0
         for i in range(cluster_th, len(data)):
-            seq = [color_of(x) for x in data[i-cluster_th:i]]
+            seq = [x.code for x in data[i-cluster_th:i]]
             if len(set(seq))==1:
                 c = seq[-1]
-                pred = "black" if c=="red" else ("red" if c=="black" else None)
-                if pred:
-                    actual = color_of(data[i])
+                pred = BLACK if c==RED else (RED if c==BLACK else None)
+                if pred is not None:
+                    actual = data[i].code
                     wins += (pred==actual)
                     loss += (pred!=actual)
         return wins, loss
 
+    def _bt_markov(self, data, params):
+        order, min_count, min_conf = strategy_args(params)
+        return backtest_markov((x.code for x in data), order, min_count, min_conf, window=HISTORY_MAX)
+
     def backtest(self, strategy, horizon=300):
-        data = list(self.history)[-horizon:]
-        if not data: return {"score":0,"roi":0,"winrate":0,"dd":0}
         t = strategy.get("type")
         p = strategy.get("params",{})
-        if t=="repeat_pattern":
+        # markov aprende online: backtest prequencial no histórico inteiro, uma passada
+        data = list(self.history) if t=="markov" else list(self.history)[-horizon:]
+        if not data: return {"score":0,"roi":0,"winrate":0,"dd":0}
+        if t=="markov":
+            w,l = self._bt_markov(data, p)
+        elif t=="repeat_pattern":
             w,l = self._bt_repeat(data, p.get("repeat_n",3), p.get("window",5))
         elif t=="alternation":
             w,l = self._bt_alternation(data, p.get("alt_len",3), p.get("window",6))
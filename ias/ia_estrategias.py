@@ -4,7 +4,7 @@ import time, random, uuid
 from core.base_agent import BaseAgent
 from core.bus import Event
 
-TEMPLATE_TYPES = ["repeat_pattern","alternation","cluster_count"]
+TEMPLATE_TYPES = ["repeat_pattern","alternation","cluster_count","markov"]
 
 def random_strategy(gen=0):
     t = random.choice(TEMPLATE_TYPES)
@@ -12,6 +12,8 @@ def random_strategy(gen=0):
         params = {"repeat_n": random.randint(2,5), "window": random.randint(3,8)}
     elif t == "alternation":
         params = {"alt_len": random.randint(2,6), "window": random.randint(3,10)}
+    elif t == "markov":
+        params = {"order": random.randint(1,10), "min_count": random.randint(3,20), "conf_pct": random.randint(40,70)}
     else:
         params = {"cluster_th": random.randint(2,6), "window": random.randint(5,12)}
     return {"id": str(uuid.uuid4())[:8], "type": t, "params": params, "meta": {"gen": gen, "origin":"ga"}}
@@ -30,6 +32,7 @@ class IAEstrategias(BaseAgent):
         self.pool = sorted(self.pool, key=lambda x: x["meta"].get("fitness",0), reverse=True)[:100]
 
     def tick(self):
+        self.state.update("ga", {"generation": self.generation, "pool_size": len(self.pool)})
         if len(self.pool) < 20:
             for _ in range(20-len(self.pool)):
                 self.bus.emit(Event("strategy.candidate", random_strategy(self.generation)))
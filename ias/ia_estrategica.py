@@ -1,23 +1,36 @@
 # -*- coding: utf-8 -*-
-"""IA Estratégica — executa a ESTRATÉGIA ATIVA (vinda do aprendiz/promoção) em tempo real."""
+"""IA Estratégica — executa a ESTRATÉGIA ATIVA (vinda do aprendiz/promoção) em tempo real.
+
+Caminho crítico: cada spin.new dispara previsão -> signal.proposed ->
+(IAAuxiliar) signal.approved na mesma chamada do bus, sem esperar tick.
+"""
 import time
 from core.base_agent import BaseAgent
 from core.bus import Event
+from core.spin import COLORS, RED, BLACK
+from markov import MarkovPredictor, strategy_args
 
-def color_of(spin):
-    return "white" if spin.get("white") else spin.get("color")
+BUFFER_MAX = 200
 
 class IAEstrategica(BaseAgent):
     TICK_MS = 400
 
     def _bind(self):
         self.buffer = []
+        # todas as ordens 1..10 atualizadas em O(k) por giro; janela = histórico do backtest
+        self.markov = MarkovPredictor(window=5000)
         self.bus.on("spin.new", self.on_spin)
         self.bus.on("strategy.promote", self.on_promote)
 
     def on_spin(self, evt):
-        self.buffer.append(evt.data)
-        self.buffer = self.buffer[-200:]
+        spin = evt.data  # core.spin.Spin
+        self.buffer.append(spin)
+        self.markov.update(spin.code)
+        if len(self.buffer) > BUFFER_MAX:
+            del self.buffer[0]
+        if self.state.get("system.paused", False) or self.state.get(f"{self.name}.paused", False):
+            return
+        self.propose(spin, evt.ts)
 
     def on_promote(self, evt):
         # recebe estratégia ativa (trial/production)
@@ -29,31 +42,35 @@ class IAEstrategica(BaseAgent):
     # Interpretadores mínimos de política (espelham backtest)
     def _predict_repeat(self, window, repeat_n):
         if len(self.buffer) < max(repeat_n, window): return None
-        seq = [color_of(s) for s in self.buffer[-repeat_n:]]
+        seq = [s.code for s in self.buffer[-repeat_n:]]
         if len(set(seq)) == 1:
-            return seq[-1]
+            return COLORS[seq[-1]]
         return None
 
     def _predict_alternation(self, alt_len, window):
         if len(self.buffer) < alt_len+1: return None
-        seq = [color_of(s) for s in self.buffer[-(alt_len+1):]]
+        seq = [s.code for s in self.buffer[-(alt_len+1):]]
         ok = True
         for i in range(1, len(seq)):
             if seq[i]==seq[i-1]: ok=False; break
         if ok:
             last = seq[-1]
-            return "red" if last=="black" else ("black" if last=="red" else None)
+            return "red" if last==BLACK else ("black" if last==RED else None)
         return None
 
     def _predict_cluster(self, cluster_th, window):
         if len(self.buffer) < cluster_th: return None
-        seq = [color_of(s) for s in self.buffer[-cluster_th:]]
+        seq = [s.code for s in self.buffer[-cluster_th:]]
         if len(set(seq))==1:
             c = seq[-1]
-            return "black" if c=="red" else ("red" if c=="black" else None)
+            return "black" if c==RED else ("red" if c==BLACK else None)
         return None
 
-    def tick(self):
+    def _predict_markov(self, params):
+        order, min_count, min_conf = strategy_args(params)
+        return self.markov.predict(order, min_count, min_conf)
+
+    def propose(self, spin, ingest_ts):
         strat = self.state.get("active.strategy")
         if not strat or not self.buffer: return
         stype = strat.get("type")
@@ -65,8 +82,15 @@ class IAEstrategica(BaseAgent):
             suggestion = self._predict_alternation(p.get("alt_len",3), p.get("window",6))
         elif stype == "cluster_count":
             suggestion = self._predict_cluster(p.get("cluster_th",3), p.get("window",8))
+        elif stype == "markov":
+            suggestion = self._predict_markov(p)
 
         if suggestion:
-            proposal = {"when": int(time.time()), "suggest": suggestion, "source":"estrategica", "strategy_id": strat.get("id"), "confidence": 0.5}
+            # trace: timestamps monotônicos de cada estágio (ver core.latency)
+            trace = {"ingest": ingest_ts, "predicted": time.monotonic()}
+            proposal = {"when": int(time.time()), "suggest": suggestion, "source":"estrategica", "strategy_id": strat.get("id"),
+                        "confidence": 0.5, "spin_seq": spin.seq, "trace": trace}
             self.state.set("signal.proposed", proposal)
             self.bus.emit(Event("signal.proposed", proposal))
+
+    def tick(self): pass
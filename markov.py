@@ -0,0 +1,139 @@
+# markov.py
+# Preditor de Markov / n-grama de ordem k sobre códigos de cor (core.spin).
+# - tabelas planas array('d') por ordem: 3^k contextos x 3 próximas cores
+# - update(code) em O(k): contexto de cada ordem é mantido incrementalmente
+# - predict(order) em O(1): um índice na tabela da ordem
+# - decay exponencial (escala global, sem varrer a tabela a cada giro)
+# - janela deslizante opcional: o giro mais antigo é descontado em O(k)
+
+from __future__ import annotations
+from array import array
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+from core.spin import COLORS
+
+K_MAX = 10
+_RESCALE_AT = 1e150  # renormaliza as tabelas quando a escala do decay cresce demais
+
+
+class MarkovPredictor:
+    """
+    Contagens de transição cor -> próxima cor para contextos de ordem k.
+
+    orders: ordens mantidas (padrão 1..K_MAX)
+    decay:  peso relativo de um giro a cada novo giro (1.0 = sem decay)
+    window: se definido, só os últimos `window` giros contam
+    """
+    def __init__(self, orders: Optional[Iterable[int]] = None, decay: float = 1.0,
+                 window: Optional[int] = None):
+        self.orders: Tuple[int, ...] = tuple(sorted(set(orders or range(1, K_MAX + 1))))
+        if not self.orders or self.orders[0] < 1 or self.orders[-1] > K_MAX:
+            raise ValueError(f"ordens devem estar em 1..{K_MAX}")
+        self.k_max = self.orders[-1]
+        self._mod = 3 ** self.k_max
+        self._pow = {k: 3 ** k for k in self.orders}
+        self.tables: Dict[int, array] = {k: array("d", [0.0]) * (3 ** k * 3) for k in self.orders}
+        self.decay = float(decay)
+        self.window = window
+        self._scale = 1.0   # peso do próximo giro (cresce com 1/decay)
+        self._ctx = 0       # últimos k_max códigos em base 3 (mais recente = dígito menos significativo)
+        self._seen = 0      # giros vistos (até k_max importa para saber quais ordens têm contexto)
+        self._win = deque()  # (contexto, nº de predecessores, código, peso) para descontar na janela
+
+    def __len__(self):
+        return self._seen
+
+    def update(self, code: int) -> None:
+        """ Registra um giro (código de cor 0/1/2) em O(k). """
+        ctx, avail, w = self._ctx, min(self._seen, self.k_max), self._scale
+        for k in self.orders:
+            if k > avail:
+                break
+            self.tables[k][(ctx % self._pow[k]) * 3 + code] += w
+        if self.window:
+            self._win.append((ctx, avail, code, w))
+            if len(self._win) > self.window:
+                self._evict()
+        self._ctx = (ctx * 3 + code) % self._mod
+        self._seen += 1
+        if self.decay != 1.0:
+            self._scale /= self.decay
+            if self._scale > _RESCALE_AT:
+                self._rescale()
+
+    def _evict(self) -> None:
+        ctx, avail, code, w = self._win.popleft()
+        for k in self.orders:
+            if k > avail:
+                break
+            i = (ctx % self._pow[k]) * 3 + code
+            t = self.tables[k]
+            t[i] = max(0.0, t[i] - w)
+
+    def _rescale(self) -> None:
+        f = 1.0 / self._scale
+        for t in self.tables.values():
+            for i in range(len(t)):
+                t[i] *= f
+        self._win = deque((c, a, code, w * f) for c, a, code, w in self._win)
+        self._scale = 1.0
+
+    def counts(self, order: int) -> Tuple[float, float, float]:
+        """ Contagens (red, black, white) do contexto atual na ordem dada. """
+        if order not in self.tables or order > self._seen:
+            return 0.0, 0.0, 0.0
+        i = (self._ctx % self._pow[order]) * 3
+        t = self.tables[order]
+        f = 1.0 / (self._scale * self.decay)  # em unidades do último giro (peso 1)
+        return t[i] * f, t[i + 1] * f, t[i + 2] * f
+
+    def probs(self, order: int) -> Dict[str, float]:
+        c = self.counts(order)
+        s = c[0] + c[1] + c[2]
+        if s <= 0:
+            return {"red": 0.0, "black": 0.0, "white": 0.0}
+        return {"red": c[0] / s, "black": c[1] / s, "white": c[2] / s}
+
+    def predict(self, order: int, min_count: float = 1.0, min_conf: float = 0.0) -> Optional[str]:
+        """
+        Cor mais provável para o próximo giro no contexto de ordem `order`,
+        ou None se houver menos de `min_count` observações ou confiança < min_conf.
+        """
+        r, b, w = self.counts(order)
+        total = r + b + w
+        if total < max(min_count, 1e-12):
+            return None
+        best = 0 if r >= b else 1
+        if w > (r if best == 0 else b):
+            best = 2
+        if (r, b, w)[best] / total < min_conf:
+            return None
+        return COLORS[best]
+
+
+def backtest_markov(codes: Iterable[int], order: int, min_count: float = 1.0, min_conf: float = 0.0,
+                    decay: float = 1.0, window: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Backtest prequencial em uma única passada: para cada giro prevê com o
+    que foi visto ANTES dele e só então atualiza. Retorna (wins, losses).
+    """
+    m = MarkovPredictor(orders=(order,), decay=decay, window=window)
+    wins = loss = 0
+    for code in codes:
+        pred = m.predict(order, min_count, min_conf)
+        if pred is not None:
+            if pred == COLORS[code]:
+                wins += 1
+            else:
+                loss += 1
+        m.update(code)
+    return wins, loss
+
+
+def strategy_args(params: dict) -> Tuple[int, float, float]:
+    """ (order, min_count, min_conf) a partir dos params de uma estratégia "markov". """
+    order = min(K_MAX, max(1, int(params.get("order", 3))))
+    min_count = float(params.get("min_count", 5))
+    min_conf = float(params.get("conf_pct", 50)) / 100.0
+    return order, min_count, min_conf
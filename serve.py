@@ -0,0 +1,52 @@
+# serve.py
+# Launcher do uvicorn com socket pré-criado (IPPROTO_TCP + TCP_NODELAY).
+#
+# `uvicorn --workers N` cria o socket de escuta com proto=0; o asyncio só
+# liga TCP_NODELAY em conexões cujo proto é IPPROTO_TCP, então com vários
+# workers cada resposta keep-alive espera o delayed ACK (~40 ms). Aqui o
+# socket é criado com o proto certo e repassado aos workers.
+#
+#   python serve.py --workers 4 --port 8000
+#
+# Com --workers > 1 ativa SPECTRA_SHARED_STATE=1 (placar 5/8 compartilhado).
+
+import argparse, os, socket
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # herdado pelas conexões aceitas no Linux; o proto acima cobre o resto
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Spectra X — uvicorn com TCP_NODELAY em todos os workers")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--log-level", default="info")
+    ap.add_argument("--no-access-log", action="store_true")
+    args = ap.parse_args()
+
+    if args.workers > 1:
+        os.environ.setdefault("SPECTRA_SHARED_STATE", "1")
+
+    config = uvicorn.Config("app:app", host=args.host, port=args.port, workers=args.workers,
+                            log_level=args.log_level, access_log=not args.no_access_log)
+    sock = bind_socket(args.host, args.port)
+    if args.workers > 1:
+        Multiprocess(config, sockets=[sock]).run()
+    else:
+        uvicorn.Server(config).run(sockets=[sock])
+
+
+if __name__ == "__main__":
+    main()
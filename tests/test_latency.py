@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Caminho crítico giro -> sinal aprovado: trace por estágio, histograma e orçamento."""
+import time
+
+import pytest
+
+from core.latency import BUCKETS_MS, LatencyTracker
+from core.system import AgentSystem
+
+# sempre sugere a cor do último giro: todo giro vira proposta aprovada
+ALWAYS = {"id": "t-repeat", "type": "repeat_pattern", "params": {"window": 1, "repeat_n": 1}}
+
+
+def trace(ingest, predict_ms, validate_ms):
+    return {"ingest": ingest, "predicted": ingest + predict_ms / 1000.0,
+            "approved": ingest + (predict_ms + validate_ms) / 1000.0}
+
+
+def test_tracker_buckets_quantiles_and_budget():
+    lt = LatencyTracker(budget_ms=10.0)
+    # e2e: 0.3, 0.3, ..., 0.3 (8x), 20, 600
+    for _ in range(8):
+        assert lt.record(trace(100.0, 0.2, 0.1)) == pytest.approx(0.3)
+    lt.record(trace(100.0, 15.0, 5.0))
+    lt.record(trace(100.0, 0.4, 599.6))
+    snap = lt.snapshot()
+    assert snap["count"] == 10
+    assert snap["over_budget"] == 2
+    assert snap["last"] == {"predict": 0.4, "validate": 599.6, "e2e": 600.0}
+    e2e = snap["stages"]["e2e"]
+    assert e2e["buckets"] == {"0.5": 8, "25": 1, "1000": 1}
+    assert e2e["p50_ms"] == 0.5 and e2e["p95_ms"] == 1000 and e2e["p99_ms"] == 1000
+    assert e2e["max_ms"] == pytest.approx(600.0)
+    assert e2e["mean_ms"] == pytest.approx((8 * 0.3 + 20 + 600) / 10, abs=1e-3)
+    assert snap["stages"]["predict"]["buckets"] == {"0.25": 8, "0.5": 1, "25": 1}
+
+
+def test_tracker_overflow_bucket_and_reset():
+    lt = LatencyTracker()
+    lt.record(trace(0.0, 5000.0, 0.0))
+    e2e = lt.snapshot()["stages"]["e2e"]
+    assert e2e["buckets"] == {"+inf": 1}
+    assert e2e["p50_ms"] is None  # sem limite superior finito
+    lt.reset()
+    snap = lt.snapshot()
+    assert snap["count"] == 0 and snap["over_budget"] == 0 and snap["stages"]["e2e"]["p50_ms"] is None
+
+
+def test_spin_is_approved_in_the_same_dispatch():
+    system = AgentSystem()  # sem start(): só o caminho disparado pelo bus
+    system.state.set("active.strategy", ALWAYS)
+    approved = []
+    system.bus.on("signal.approved", lambda evt: approved.append(evt.data["proposal"]))
+    for i, num in enumerate((1, 9, 0, 3)):
+        ingest = time.monotonic()
+        spin = system.push_spin(num, ingest)
+        assert len(approved) == i + 1  # já aprovado quando push_spin retorna
+        prop = approved[-1]
+        assert prop["spin_seq"] == spin.seq and prop["suggest"] == spin.color
+        t = prop["trace"]
+        assert t["ingest"] == ingest <= t["predicted"] <= t["approved"] <= time.monotonic()
+    snap = system.latency.snapshot()
+    assert snap["count"] == 4 and snap["over_budget"] == 0
+    assert sum(snap["stages"]["e2e"]["buckets"].values()) == 4
+
+
+def test_no_strategy_no_latency_sample():
+    system = AgentSystem()
+    system.push_spin(5, time.monotonic())
+    assert system.latency.snapshot()["count"] == 0
+
+
+def test_budget_from_config_counts_overruns_and_rate_limits_alerts(monkeypatch):
+    pytest.importorskip("httpx")  # TestClient
+    from fastapi.testclient import TestClient
+    import app
+
+    system = AgentSystem()
+    system.state.set("active.strategy", ALWAYS)
+    monkeypatch.setattr(app, "SYSTEM", system)
+    alerts = []
+    system.bus.on("latency.alert", lambda evt: alerts.append(evt.data))
+
+    c = TestClient(app.app)
+    c.post("/reset")
+    r = c.post("/api/config", json={"latency_budget_ms": 0.0})
+    assert r.json()["latency_budget_ms"] == 0.0
+    assert system.latency.budget_ms == 0.0
+    for num in (1, 2, 3, 4, 5):
+        c.post("/api/push_round", json={"number": num})
+
+    lat = c.get("/api/latency").json()
+    assert lat["count"] == 5 and lat["over_budget"] == 5 and lat["budget_ms"] == 0.0
+    # estouros todos contados, mas no máximo um alerta por ALERT_EVERY_S
+    assert len(alerts) == 1
+    assert alerts[0]["budget_ms"] == 0.0 and alerts[0]["e2e_ms"] > 0.0
+    assert any("acima do orçamento" in e["msg"] for e in system.state.tail_events(10))
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""MarkovPredictor: contagens incrementais batem com contagem por força bruta."""
+import random
+
+import pytest
+
+from markov import MarkovPredictor, backtest_markov
+
+
+def brute_counts(codes, order, window=None, decay=1.0):
+    n = len(codes)
+    first = 0 if window is None else n - window
+    ctx = codes[n - order:]
+    cnt = [0.0, 0.0, 0.0]
+    for p in range(max(first, order), n):
+        if codes[p - order:p] == ctx:
+            cnt[codes[p]] += decay ** (n - 1 - p)
+    return cnt
+
+
+@pytest.fixture
+def codes():
+    rnd = random.Random(3)
+    return [rnd.choice([0] * 7 + [1] * 7 + [2]) for _ in range(3000)]
+
+
+@pytest.mark.parametrize("order", [1, 3, 6, 10])
+def test_counts_without_window(codes, order):
+    m = MarkovPredictor()
+    for c in codes:
+        m.update(c)
+    assert list(m.counts(order)) == pytest.approx(brute_counts(codes, order))
+
+
+@pytest.mark.parametrize("order", [1, 2, 5, 10])
+@pytest.mark.parametrize("window", [1, 50, 300])
+def test_counts_with_window_eviction(codes, order, window):
+    m = MarkovPredictor(window=window)
+    for c in codes:
+        m.update(c)
+    assert list(m.counts(order)) == pytest.approx(brute_counts(codes, order, window))
+
+
+def test_counts_with_decay_and_window(codes):
+    m = MarkovPredictor(orders=(2,), decay=0.99, window=500)
+    for c in codes:
+        m.update(c)
+    assert list(m.counts(2)) == pytest.approx(brute_counts(codes, 2, 500, 0.99))
+
+
+def test_decay_rescale_keeps_ratios(codes):
+    m = MarkovPredictor(orders=(1,), decay=0.5)  # força várias renormalizações
+    for c in codes:
+        m.update(c)
+    assert list(m.counts(1)) == pytest.approx(brute_counts(codes, 1, decay=0.5))
+
+
+def test_backtest_is_prequential(codes):
+    # mesma previsão que um preditor alimentado giro a giro, sem olhar o futuro
+    m = MarkovPredictor(orders=(3,))
+    wins = loss = 0
+    for c in codes:
+        pred = m.predict(3, 5, 0.5)
+        if pred is not None:
+            wins += pred == ("red", "black", "white")[c]
+            loss += pred != ("red", "black", "white")[c]
+        m.update(c)
+    assert backtest_markov(codes, 3, 5, 0.5) == (wins, loss)
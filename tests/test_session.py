@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Placar 5/8: modos memória e compartilhado dão as mesmas decisões da versão original."""
+import multiprocessing as mp
+import random
+
+import pytest
+
+from app import apply_5_8, number_to_color
+from core.session import HEADER_SIZE, NAME_MAX, RECORD, MemorySessionStore, SessionFull, SharedSessionStore, blank_record
+
+
+def reference_5_8(numbers):
+    """Regra 5/8 como era no push_round original (estado em globais)."""
+    stats = {"whites_today": 0, "losses_today": 0, "attempts_today": 0, "dist_desde_white": None, "total_spins": 0}
+    last_entry = False
+    out = []
+    for num in numbers:
+        color = number_to_color(num)
+        stats["total_spins"] += 1
+        if last_entry:
+            stats["attempts_today"] += 1
+            if color == "white":
+                stats["whites_today"] += 1
+            else:
+                stats["losses_today"] += 1
+        if color == "white":
+            stats["dist_desde_white"] = 0
+        elif stats["dist_desde_white"] is not None:
+            stats["dist_desde_white"] += 1
+        action = "entrar_white" if stats["dist_desde_white"] in (4, 7) else "aguardar"
+        last_entry = action == "entrar_white"
+        out.append((action, dict(stats)))
+    return out
+
+
+def replay(store, numbers, table="default"):
+    out = []
+    for num in numbers:
+        color = number_to_color(num)
+        (action, _reason), rec, _version = store.transact(table, lambda st: apply_5_8(st, color))
+        rec = dict(rec); rec.pop("last_entry")
+        out.append((action, rec))
+    return out
+
+
+@pytest.fixture
+def numbers():
+    rnd = random.Random(7)
+    return [rnd.randint(0, 14) for _ in range(3000)]
+
+
+def test_replay_matches_original_in_both_modes(numbers, tmp_path):
+    expected = reference_5_8(numbers)
+    assert replay(MemorySessionStore(), numbers) == expected
+    assert replay(SharedSessionStore(str(tmp_path / "s.bin")), numbers) == expected
+
+
+def test_push_round_http_matches_original(numbers):
+    pytest.importorskip("httpx")  # TestClient
+    from fastapi.testclient import TestClient
+    import app
+
+    c = TestClient(app.app)
+    c.post("/reset?table=replay")
+    got = []
+    for num in numbers[:500]:
+        d = c.post("/api/push_round", json={"number": num, "table": "replay"}).json()
+        got.append((d["action"], d["stats"]))
+    assert got == reference_5_8(numbers[:500])
+
+
+def test_stats_etag_304_and_invalidation():
+    pytest.importorskip("httpx")  # TestClient
+    from fastapi.testclient import TestClient
+    import app
+
+    c = TestClient(app.app)
+    c.post("/reset?table=etag")
+    r = c.post("/api/push_round", json={"number": 3, "table": "etag"})
+    etag = r.headers["etag"]
+    first = c.get("/stats?table=etag")
+    assert first.status_code == 200 and first.headers["etag"] == etag
+    assert first.json() == r.json()["stats"]
+
+    for inm in (etag, "W/" + etag, "*", f'"outra", {etag}'):
+        r = c.get("/stats?table=etag", headers={"If-None-Match": inm})
+        assert r.status_code == 304 and r.content == b"" and r.headers["etag"] == etag
+    assert c.get("/stats?table=etag", headers={"If-None-Match": '"outra"'}).status_code == 200
+
+    # push_round e /reset trocam a versão: o ETag antigo não vale mais
+    r = c.post("/api/push_round", json={"number": 0, "table": "etag"})
+    pushed = r.headers["etag"]
+    assert pushed != etag
+    r = c.get("/stats?table=etag", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] == pushed
+    assert r.json()["total_spins"] == 2 and r.json()["dist_desde_white"] == 0
+
+    reset = c.post("/reset?table=etag")
+    assert reset.headers["etag"] not in (etag, pushed)
+    r = c.get("/stats?table=etag", headers={"If-None-Match": pushed})
+    assert r.status_code == 200 and r.json()["total_spins"] == 0
+    assert c.get("/stats?table=etag", headers={"If-None-Match": reset.headers["etag"]}).status_code == 304
+
+
+def _bump(path, n):
+    store = SharedSessionStore(path)
+    for i in range(n):
+        store.transact(f"t{i % 3}", lambda r: r.__setitem__("total_spins", r["total_spins"] + 1))
+
+
+def test_shared_updates_are_atomic_across_processes(tmp_path):
+    path = str(tmp_path / "s.bin")
+    SharedSessionStore(path)
+    procs = [mp.Process(target=_bump, args=(path, 300)) for _ in range(4)]
+    for p in procs: p.start()
+    for p in procs: p.join()
+    store = SharedSessionStore(path)
+    assert sum(store.read(f"t{k}")[0]["total_spins"] for k in range(3)) == 1200
+
+
+def _claim(path, order):
+    store = SharedSessionStore(path)
+    for t in order:
+        store.transact(t, lambda r: r.__setitem__("total_spins", r["total_spins"] + 1))
+
+
+def test_concurrent_first_use_gives_one_slot_per_table(tmp_path):
+    path = str(tmp_path / "s.bin")
+    SharedSessionStore(path, nslots=64)
+    tables = [f"mesa-{i}" for i in range(40)]
+    procs = [mp.Process(target=_claim, args=(path, tables[::1 if k % 2 else -1])) for k in range(4)]
+    for p in procs: p.start()
+    for p in procs: p.join()
+    store = SharedSessionStore(path)
+    names = [store._unpack(store._offset(t))[2] for t in tables]
+    slots = [store._mm[off:off + NAME_MAX] for off in range(HEADER_SIZE, HEADER_SIZE + 64 * RECORD.size, RECORD.size)]
+    assert all(slots.count(n) == 1 for n in names)
+    assert all(store.read(t)[0]["total_spins"] == 4 for t in tables)
+
+
+@pytest.mark.parametrize("make", ["memory", "shared"])
+def test_reads_do_not_claim_slots_and_full_store_raises(make, tmp_path):
+    store = MemorySessionStore(nslots=4) if make == "memory" else SharedSessionStore(str(tmp_path / "s.bin"), nslots=4)
+    for i in range(10):
+        assert store.read(f"r{i}") == (blank_record(), 0)
+    for i in range(4):
+        store.transact(f"w{i}", lambda r: None)
+    with pytest.raises(SessionFull):
+        store.transact("extra", lambda r: None)
+    assert store.read("extra") == (blank_record(), 0)
+    with pytest.raises(ValueError):
+        store.read("x" * 33)
+    with pytest.raises(ValueError):
+        store.transact("com espaço", lambda r: None)
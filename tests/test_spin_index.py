@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""SpinIndex: consultas O(1) batem com contagem por força bruta, inclusive após compactação."""
+import random
+from collections import Counter
+
+import pytest
+
+from core.spin_index import SpinIndex
+
+
+@pytest.fixture
+def codes():
+    rnd = random.Random(5)
+    return [rnd.choice([0] * 7 + [1] * 7 + [2]) for _ in range(3000)]
+
+
+def build(codes, capacity):
+    ix = SpinIndex(capacity=capacity)
+    for c in codes:
+        ix.append(c)
+    return ix
+
+
+@pytest.mark.parametrize("capacity", [100000, 500, 37])
+def test_range_counts_match_brute_force(codes, capacity):
+    ix = build(codes, capacity)
+    lo, hi = ix.bounds()
+    assert hi == len(codes) == len(ix)
+    assert hi - lo >= min(capacity, len(codes))
+    rnd = random.Random(1)
+    for _ in range(300):
+        i = rnd.randint(lo, hi); j = rnd.randint(i, hi)
+        _, _, c = ix.counts(i, j)
+        seg = codes[i:j]
+        assert c == {"red": seg.count(0), "black": seg.count(1), "white": seg.count(2)}
+
+
+def test_ranges_are_clamped_to_retained_window(codes):
+    ix = build(codes, 500)
+    lo, hi = ix.bounds()
+    start, end, c = ix.counts(0, hi)
+    assert (start, end) == (lo, hi)
+    assert sum(c.values()) == hi - lo
+    start, end, c = ix.counts(-10)
+    seg = codes[-10:]
+    assert (start, end) == (hi - 10, hi)
+    assert c["white"] == seg.count(2)
+
+
+def test_last_and_frequencies(codes):
+    ix = build(codes, 500)
+    _, _, c = ix.last(100)
+    seg = codes[-100:]
+    assert c == {"red": seg.count(0), "black": seg.count(1), "white": seg.count(2)}
+    _, _, f = ix.frequencies(-100)
+    assert f["white"] == pytest.approx(seg.count(2) / 100)
+
+
+@pytest.mark.parametrize("n", [100, 101, 150, 199, 200, 1000])
+def test_last_longer_than_history(codes, n):
+    # len < n: devolve o histórico inteiro, não uma leitura "a partir do fim"
+    ix = build(codes[:100], 500)
+    start, end, c = ix.last(n)
+    assert (start, end) == (0, 100)
+    assert c == {"red": codes[:100].count(0), "black": codes[:100].count(1), "white": codes[:100].count(2)}
+    assert ix.query(last=n)["n"] == 100
+
+
+def test_last_after_compaction_is_clamped(codes):
+    ix = build(codes, 500)
+    lo, hi = ix.bounds()
+    start, end, c = ix.last(hi - lo + 300)
+    assert (start, end) == (lo, hi)
+    assert sum(c.values()) == hi - lo
+
+
+@pytest.mark.parametrize("capacity", [100000, 500, 37])
+def test_gap_histogram_and_since_white_after_compaction(codes, capacity):
+    ix = build(codes, capacity)
+    lo, hi = ix.bounds()
+    whites = [p for p in range(lo, hi) if codes[p] == 2]
+    assert Counter(ix.gap_histogram()) == Counter(b - a for a, b in zip(whites, whites[1:]))
+    assert ix.since_white() == (hi - 1 - whites[-1] if whites else None)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Snapshot de /api/state: montado uma vez por versão do StateStore."""
+import json
+
+import pytest
+
+from core.system import AgentSystem
+
+
+def test_snapshot_is_cached_until_a_write():
+    system = AgentSystem()
+    etag, body = system.snapshot()
+    etag2, body2 = system.snapshot()
+    assert etag2 == etag and body2 is body  # mesmo objeto bytes, sem reserializar
+
+    # tick mexe em _last_tick sem escrever no StateStore: snapshot não pode depender dele
+    for agent in system.registry.agents.values():
+        agent._last_tick = 123.0
+    assert system.snapshot()[1] is body
+    assert all("last_tick" not in a for a in json.loads(body)["agents"].values())
+
+    system.push_spin(7)
+    etag3, body3 = system.snapshot()
+    assert etag3 != etag and body3 is not body
+    assert json.loads(body3)["history_tail"][-1]["n"] == 7
+    assert system.snapshot()[1] is body3
+
+
+def test_state_http_304_until_write(monkeypatch):
+    pytest.importorskip("httpx")  # TestClient
+    from fastapi.testclient import TestClient
+    import app
+
+    system = AgentSystem()
+    monkeypatch.setattr(app, "SYSTEM", system)
+    c = TestClient(app.app)
+    r = c.get("/api/state")
+    etag = r.headers["etag"]
+    assert r.status_code == 200 and r.content == system.snapshot()[1]
+    assert c.get("/api/state", headers={"If-None-Match": etag}).status_code == 304
+    system.state.set("system.paused", True)
+    r = c.get("/api/state", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag and r.json()["paused"] is True